@@ -1,25 +1,48 @@
 import os
 import json
 import eventlet
+from eventlet import tpool # Run blocking gRPC/Firestore calls on native OS threads
 eventlet.monkey_patch() # Patch standard library for async operations (e.g., requests)
 import tempfile
-import requests # Used for robust HTTP requests, especially for streaming
 
 from flask import Flask, request, Response, abort, render_template, jsonify, make_response, redirect, url_for, send_from_directory
 from flask_cors import CORS
 from flask_socketio import SocketIO, emit, join_room, leave_room
 import logging
+import threading # Lock around the pending-sync buffer
+import time # For client-facing sync timestamps
 import uuid
-import re # For regex parsing URLs
+import bisect # For mapping search-blob hit offsets back to song indices
 import random # Kept, potentially useful for future general randomization
 import firebase_admin
 from firebase_admin import credentials, firestore, auth
-from functools import wraps
+from google.api_core import exceptions as gcp_exceptions # Narrow Firestore error classes
+from functools import wraps, lru_cache
 import datetime # For session cookie expiration
-from flask_caching import Cache # Import Flask-Caching
+from cachetools import TTLCache # In-process TTL cache for hot jam documents
 import secrets # Import secrets for generating a secure key
 from werkzeug.exceptions import HTTPException # Import for custom error handling
 
+try:
+    import numpy as np # Optional: vectorizes the hosted-song search
+except ImportError:
+    np = None
+
+try:
+    import orjson # Optional: much faster JSON encode/decode than stdlib
+except ImportError:
+    orjson = None
+
+try:
+    import uuid6 # Optional: time-ordered UUIDv7 for song IDs
+except ImportError:
+    uuid6 = None
+
+def _new_song_id():
+    """Generates a song ID; UUIDv7 when available so IDs sort by creation time
+    and downstream indexes see append-only inserts instead of random keys."""
+    return str(uuid6.uuid7()) if uuid6 else str(uuid.uuid4())
+
 # Initialize Flask app, telling it to look for templates in the current directory (root)
 app = Flask(__name__, template_folder='.')
 CORS(app, supports_credentials=True) # Enable CORS and support credentials (for cookies)
@@ -37,15 +60,54 @@ else:
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
-# --- CONFIGURATION: Flask-Caching (Simplified to 'simple' in-memory cache) ---
-app.config["CACHE_TYPE"] = "simple"
-app.config["CACHE_DEFAULT_TIMEOUT"] = 3600 # Cache items for 1 hour (3600 seconds) by default
-logging.info("Flask-Caching configured with 'simple' in-memory cache.")
-
-cache = Cache(app) # Initialize the cache after configuration
+# --- CONFIGURATION: orjson for JSON serialization (optional) ---
+_socketio_json = None
+if orjson is not None:
+    from flask.json.provider import DefaultJSONProvider
+
+    class ORJSONProvider(DefaultJSONProvider):
+        """Flask JSON provider backed by orjson."""
+        def dumps(self, obj, **kwargs):
+            return orjson.dumps(obj, default=self.default).decode()
+
+        def loads(self, s, **kwargs):
+            return orjson.loads(s)
+
+    class _OrjsonSocketIOJson:
+        """Module-like dumps/loads shim for python-socketio (which passes
+        stdlib-json kwargs like `separators` that orjson does not accept)."""
+        @staticmethod
+        def dumps(obj, **kwargs):
+            return orjson.dumps(obj).decode()
+
+        @staticmethod
+        def loads(s, **kwargs):
+            return orjson.loads(s)
+
+    app.json = ORJSONProvider(app)
+    _socketio_json = _OrjsonSocketIOJson
+    logging.info("orjson available: using it for Flask jsonify and Socket.IO payloads.")
+else:
+    logging.info("orjson not installed: falling back to stdlib json.")
+
+# --- CONFIGURATION: Socket.IO message queue (for multi-instance deployments) ---
+# On Vercel (or any multi-instance setup) each instance has its own sockets;
+# a Redis message queue lets room broadcasts reach clients connected to other
+# instances, and makes the in-process caches above safe to treat as purely
+# best-effort. Without REDIS_URL the app behaves exactly as before.
+_REDIS_URL = os.environ.get('REDIS_URL')
+if _REDIS_URL:
+    logging.info("REDIS_URL set: Socket.IO will coordinate broadcasts across instances via Redis.")
+else:
+    logging.warning("REDIS_URL not set. Socket.IO broadcasts are limited to this instance; "
+                    "set REDIS_URL for multi-instance deployments.")
 
-# Explicitly pass the Flask app to SocketIO and set async_mode
-socketio = SocketIO(app, cors_allowed_origins="*", manage_session=False, async_mode='eventlet')
+# Explicitly pass the Flask app to SocketIO and set async_mode.
+# WebSocket-only: long-polling fallback doubles request volume and adds
+# hundreds of ms to every broadcast, and eventlet serves WebSocket natively.
+socketio = SocketIO(app, cors_allowed_origins="*", manage_session=False, async_mode='eventlet',
+                    json=_socketio_json, message_queue=_REDIS_URL,
+                    transports=['websocket'], ping_interval=25, ping_timeout=60)
 
 logging.info("Flask app and SocketIO initialized.")
 
@@ -111,6 +173,51 @@ except Exception as e:
     logging.error(f"Error loading hosted songs manifest at startup: {e}")
     HOSTED_SONGS_DATA = []
 
+# --- Hosted Songs Search Index ---
+def _build_search_index(songs):
+    """Builds the search structures over lowercased title/artist.
+
+    Returns a trigram posting-list index (each 3-gram maps to the set of song
+    indices containing it), the per-song lowercased search texts, and a single
+    concatenated bytes blob plus per-line offsets. The blob lets short queries
+    run through one C-level ``bytes.find`` loop instead of a Python scan, with
+    hit offsets mapped back to song indices via ``bisect``.
+    """
+    trigrams = {}
+    texts = []
+    parts = []
+    offsets = []
+    pos = 0
+    for i, song in enumerate(songs):
+        text = f"{song.get('title', '').lower()}\x1f{song.get('artist', '').lower()}"
+        texts.append(text)
+        for j in range(len(text) - 2):
+            trigrams.setdefault(text[j:j + 3], set()).add(i)
+        line = text.encode('utf-8', 'replace') + b'\n'
+        offsets.append(pos)
+        parts.append(line)
+        pos += len(line)
+    return trigrams, texts, b''.join(parts), offsets
+
+SEARCH_TRIGRAM_INDEX, SEARCH_TEXTS, SEARCH_BLOB, SEARCH_BLOB_OFFSETS = _build_search_index(HOSTED_SONGS_DATA)
+logging.info(f"Built search index with {len(SEARCH_TRIGRAM_INDEX)} trigrams over {len(HOSTED_SONGS_DATA)} songs.")
+
+# With NumPy available, the whole search collapses to one vectorized
+# np.char.find over a fixed-width unicode array of the search texts.
+SEARCH_TEXTS_ARRAY = np.array(SEARCH_TEXTS) if np is not None and SEARCH_TEXTS else None
+if SEARCH_TEXTS_ARRAY is not None:
+    logging.info("NumPy available: hosted-song search will use vectorized np.char.find.")
+
+def _blob_search(query):
+    """Finds song indices whose title/artist contain `query` via one C-level scan."""
+    needle = query.encode('utf-8', 'replace')
+    hits = set()
+    pos = SEARCH_BLOB.find(needle)
+    while pos != -1:
+        hits.add(bisect.bisect_right(SEARCH_BLOB_OFFSETS, pos) - 1)
+        pos = SEARCH_BLOB.find(needle, pos + 1)
+    return hits
+
 # --- Helper for getting base URL ---
 def get_base_url():
     return request.url_root # This typically returns http://example.com/
@@ -205,41 +312,372 @@ def index():
     # The frontend JavaScript loaded by index.html should then display the appropriate content.
     return render_template('index.html')
 
+def _get_hosted_songs():
+    """Returns the in-memory hosted songs list (may be empty).
+
+    Both the manifest route and the search route read this directly; nothing
+    should call a view function for the data and pay Response construction
+    plus re-parsing for what is already a module-level list.
+    """
+    return HOSTED_SONGS_DATA
+
+# The manifest never changes within a process lifetime, so it is serialized
+# exactly once here (orjson when available) and every request returns the
+# same bytes. That beats @cache.cached, which still pays a cache lookup,
+# pickle round-trip and Response rebuild per hit.
+HOSTED_SONGS_MANIFEST_BYTES = None
+if HOSTED_SONGS_DATA:
+    if orjson is not None:
+        HOSTED_SONGS_MANIFEST_BYTES = orjson.dumps(HOSTED_SONGS_DATA)
+    else:
+        HOSTED_SONGS_MANIFEST_BYTES = json.dumps(HOSTED_SONGS_DATA).encode('utf-8')
+
 @app.route('/hosted_songs_manifest.json')
-@cache.cached(timeout=86400)
 def hosted_songs_manifest_route():
-    if HOSTED_SONGS_DATA:
-        logging.info("Served hosted songs manifest from global cache.")
-        return jsonify(HOSTED_SONGS_DATA)
+    if HOSTED_SONGS_MANIFEST_BYTES is not None:
+        return Response(HOSTED_SONGS_MANIFEST_BYTES, mimetype='application/json')
     else:
         logging.error("Hosted songs manifest data is empty or not loaded.")
         return jsonify({"error": "Hosted songs manifest not found on server."}), 404
 
 @app.route('/downloads/<path:filename>')
 def serve_downloaded_file(filename):
-    return send_from_directory(DOWNLOAD_DIR, filename)
+    # conditional=True gives ETag/Last-Modified (304 on repeat requests) and
+    # proper Range/206 handling for seeks; with the file served through
+    # wsgi.file_wrapper, eventlet can use the zero-copy sendfile path.
+    return send_from_directory(DOWNLOAD_DIR, filename, conditional=True, max_age=86400)
+
+# Pre-serialized search responses keyed by query. Popular queries repeat
+# constantly; a hit returns the cached JSON bytes without matching or
+# re-serializing anything. The manifest is static for a process lifetime, so
+# the TTL only bounds memory.
+_SEARCH_RESPONSE_CACHE = TTLCache(maxsize=4096, ttl=300)
 
 @app.route('/search_hosted_mp3s')
 def search_hosted_mp3s():
     query = request.args.get('query', '').lower()
-    
-    if not HOSTED_SONGS_DATA:
+
+    cached_body = _SEARCH_RESPONSE_CACHE.get(query)
+    if cached_body is not None:
+        return Response(cached_body, mimetype='application/json')
+
+    if not _get_hosted_songs():
         return jsonify({"error": "Hosted MP3 songs manifest not loaded or is empty on the server. Please ensure 'hosted_songs_manifest.json' is present."}), 500
 
-    filtered_songs = []
-    for song in HOSTED_SONGS_DATA:
-        if query in song.get('title', '').lower() or query in song.get('artist', '').lower():
-            filtered_songs.append(song)
-    
+    if SEARCH_TEXTS_ARRAY is not None:
+        # One vectorized C call across all songs replaces the per-song loop.
+        mask = np.char.find(SEARCH_TEXTS_ARRAY, query) >= 0
+        filtered_songs = [HOSTED_SONGS_DATA[i] for i in np.nonzero(mask)[0]]
+    elif len(query) < 3:
+        # Query too short for the trigram index; one C-level scan over the blob
+        # instead of a per-song Python loop.
+        filtered_songs = [HOSTED_SONGS_DATA[i] for i in sorted(_blob_search(query))]
+    else:
+        candidates = None
+        for j in range(len(query) - 2):
+            postings = SEARCH_TRIGRAM_INDEX.get(query[j:j + 3])
+            if not postings:
+                candidates = set()
+                break
+            candidates = postings if candidates is None else candidates & postings
+        # Verify survivors with a real substring check: the trigram intersection
+        # can include songs whose trigrams are present but not contiguous.
+        filtered_songs = [HOSTED_SONGS_DATA[i] for i in sorted(candidates)
+                          if query in SEARCH_TEXTS[i]]
+
     logging.info(f"Found {len(filtered_songs)} hosted MP3s for query '{query}'")
-    return jsonify(filtered_songs)
+    body = orjson.dumps(filtered_songs) if orjson else json.dumps(filtered_songs).encode('utf-8')
+    _SEARCH_RESPONSE_CACHE[query] = body
+    return Response(body, mimetype='application/json')
 
 # --- Jam Session Firestore Utilities ---
+@lru_cache(maxsize=10000)
+def _jam_ref_cached(jam_id):
+    # DocumentReference construction reparses the path and rebuilds protobuf
+    # path segments; the references themselves are immutable and stateless,
+    # so memoizing them is safe and saves that work on every hot event.
+    return db.collection('jam_sessions').document(jam_id)
+
 def get_jam_session_ref(jam_id):
     if not db:
         logging.error("Firestore DB not initialized for get_jam_session_ref.")
         return None
-    return db.collection('jam_sessions').document(jam_id)
+    return _jam_ref_cached(jam_id)
+
+# Short-TTL cache of jam documents so bursts of events against the same jam
+# don't each pay a cold Firestore read. Local writes invalidate the entry;
+# the TTL bounds staleness for writes made by other instances.
+_JAM_CACHE = TTLCache(maxsize=1024, ttl=2.0)
+
+# Everything a joiner needs from the jam document; projecting to these keeps
+# bookkeeping fields (created_at, ended_at, host nickname, ...) off the wire.
+_JAM_JOIN_FIELDS = ['is_active', 'host_sid', 'name', 'playlist', 'playback_state']
+
+def get_jam(jam_id):
+    """Returns the joiner-relevant jam fields as a dict (cached for up to 2s),
+    or None."""
+    jam_data = _JAM_CACHE.get(jam_id)
+    if jam_data is not None:
+        return jam_data
+    jam_ref = get_jam_session_ref(jam_id)
+    if jam_ref is None:
+        return None
+    jam_doc = jam_ref.get(field_paths=_JAM_JOIN_FIELDS)
+    if not jam_doc.exists:
+        return None
+    jam_data = jam_doc.to_dict()
+    _JAM_CACHE[jam_id] = jam_data
+    return jam_data
+
+def _invalidate_jam_cache(jam_id):
+    _JAM_CACHE.pop(jam_id, None)
+
+# Local {sid: nickname} view per jam so joiners don't pay a subcollection
+# query when this instance has seen the room recently. Short TTL: joins made
+# through other instances only become visible here on refresh.
+_PARTICIPANTS_CACHE = TTLCache(maxsize=1024, ttl=30)
+
+def _get_jam_participants(jam_id):
+    """Returns the jam's {sid: nickname} map, from the local cache when warm.
+
+    Participants are stored one document per SID
+    (jam_sessions/{jam_id}/participants/{sid}) so joins and leaves are
+    independent single-document writes instead of rewrites of a shared map;
+    on a cache miss the map is rebuilt with one subcollection query.
+    """
+    cached = _PARTICIPANTS_CACHE.get(jam_id)
+    if cached is not None:
+        return dict(cached)
+    jam_ref = get_jam_session_ref(jam_id)
+    if jam_ref is None:
+        return {}
+    participants = {doc.id: (doc.to_dict() or {}).get('nickname', 'Listener')
+                    for doc in jam_ref.collection('participants').stream()}
+    _PARTICIPANTS_CACHE[jam_id] = dict(participants)
+    return participants
+
+# In-process view of each jam's playlist, refreshed whenever this instance
+# sees the full playlist (host syncs) and patched on add/remove. The index
+# map gives O(1) song_id -> position lookup so removals don't scan the
+# playlist; entries are verified against the authoritative data before use.
+# TTL-bounded: jams abandoned by unclean disconnects age out instead of
+# accumulating for the lifetime of the (long-lived eventlet) worker.
+_PLAYLIST_CACHE = TTLCache(maxsize=1024, ttl=6 * 3600) # jam_id -> list[song]
+_PLAYLIST_INDEX = TTLCache(maxsize=1024, ttl=6 * 3600) # jam_id -> {song_id: index}
+
+# Which jam each connected socket is in, so a disconnect (clean or not) can
+# be tied back to its session without consulting Firestore. Same rationale
+# for the TTL bound as above.
+_SID_JAM = TTLCache(maxsize=16384, ttl=24 * 3600) # sid -> jam_id
+
+def _playlist_cache_set(jam_id, playlist):
+    _PLAYLIST_CACHE[jam_id] = playlist
+    _PLAYLIST_INDEX[jam_id] = {s.get('id'): i for i, s in enumerate(playlist)}
+
+def _playlist_cache_add(jam_id, song):
+    playlist = _PLAYLIST_CACHE.get(jam_id)
+    if playlist is None:
+        return
+    _PLAYLIST_INDEX[jam_id][song.get('id')] = len(playlist)
+    playlist.append(song)
+
+def _playlist_cache_remove(jam_id, song_id):
+    playlist = _PLAYLIST_CACHE.get(jam_id)
+    index_map = _PLAYLIST_INDEX.get(jam_id)
+    if playlist is None or index_map is None:
+        return
+    index = index_map.pop(song_id, None)
+    if index is None or index >= len(playlist) or playlist[index].get('id') != song_id:
+        # Cache drifted; rebuild it from scratch
+        _playlist_cache_set(jam_id, [s for s in playlist if s.get('id') != song_id])
+        return
+    playlist.pop(index)
+    for i in range(index, len(playlist)): # Reindex the shifted suffix
+        index_map[playlist[i].get('id')] = i
+
+def _playlist_cache_drop(jam_id):
+    _PLAYLIST_CACHE.pop(jam_id, None)
+    _PLAYLIST_INDEX.pop(jam_id, None)
+
+# Local cache of each jam's host SID so host-only events can skip the
+# Firestore host-verification read entirely. Best-effort: on a miss (fresh
+# process, or another instance created the jam) handlers fall back to the
+# transactional host check below. Firestore stays the source of truth; the
+# TTL bounds how long another instance's host handoff can go unseen here.
+_HOST_SID_CACHE = TTLCache(maxsize=4096, ttl=300)
+
+def _apply_host_update(jam_id, jam_ref, sid, updates):
+    """Applies a host-only update, skipping the Firestore host-verification
+    read when the local host_sid cache already identifies `sid` as the host.
+
+    On a cache miss (fresh process, or the jam was created on another
+    instance) the verification and the write go through one transactional
+    closure, so a concurrent host handoff between check and write is
+    rejected by Firestore's optimistic concurrency instead of slipping
+    through a get-then-update window.
+    """
+    cached_host = _HOST_SID_CACHE.get(jam_id)
+    if cached_host is not None and cached_host != sid:
+        # Known host is someone else - reject without any Firestore traffic.
+        raise PermissionError('Only the host can modify this jam session.')
+    # Only the Firestore RPC crosses to a native thread; the TTLCache
+    # bookkeeping around it is not thread-safe and stays on this greenlet.
+    if cached_host is None:
+        tpool.execute(_host_guarded_update, db.transaction(), jam_ref, sid, updates)
+        _HOST_SID_CACHE[jam_id] = sid # The transaction just proved sid is the host
+    else:
+        tpool.execute(jam_ref.update, updates)
+    _invalidate_jam_cache(jam_id)
+
+@firestore.transactional
+def _host_guarded_update(transaction, jam_ref, host_sid, updates):
+    """Verifies the caller is the host and applies `updates`, in one round-trip.
+
+    Raises LookupError if the jam does not exist and PermissionError if the
+    caller is not the host.
+    """
+    # Only host_sid crosses the wire, not the playlist or jam metadata
+    snapshot = jam_ref.get(transaction=transaction, field_paths=['host_sid'])
+    if not snapshot.exists:
+        raise LookupError('Jam session not found.')
+    if snapshot.to_dict().get('host_sid') != host_sid:
+        raise PermissionError('Only the host can modify this jam session.')
+    transaction.update(jam_ref, updates)
+
+@firestore.transactional
+def _leave_jam_tx(transaction, jam_ref, sid):
+    """Removes `sid` from a jam, or ends the jam if `sid` is the host, in a
+    single read+commit round-trip. Returns True when the session was ended.
+
+    Raises LookupError if the jam does not exist.
+    """
+    snapshot = jam_ref.get(transaction=transaction, field_paths=['host_sid'])
+    if not snapshot.exists:
+        raise LookupError('Jam session not found.')
+    if snapshot.to_dict().get('host_sid') == sid:
+        transaction.update(jam_ref, {'is_active': False, 'ended_at': firestore.SERVER_TIMESTAMP})
+        return True
+    transaction.delete(jam_ref.collection('participants').document(sid))
+    return False
+
+@firestore.transactional
+def _remove_song_tx(transaction, jam_ref, host_sid, song_id, index_hint=None,
+                    extra_updates=None):
+    """Removes `song_id` from the playlist, verifying the host, in one round-trip.
+
+    `index_hint` is the locally cached position of the song; when it still
+    matches the authoritative playlist the removal is O(1) instead of a scan.
+    `extra_updates` lets the caller piggyback other pending fields (e.g. a
+    drained playback-state sync) onto the same commit RPC; any 'playlist'
+    entry in it is discarded since ArrayRemove supersedes a stale full copy.
+    Returns True if a song was actually removed. Raises like
+    _host_guarded_update for missing jams / non-host callers.
+    """
+    # Project just the fields the removal needs
+    snapshot = jam_ref.get(transaction=transaction,
+                           field_paths=['host_sid', 'playlist',
+                                        'playback_state.current_track_index'])
+    if not snapshot.exists:
+        raise LookupError('Jam session not found.')
+    jam_data = snapshot.to_dict()
+    if jam_data.get('host_sid') != host_sid:
+        raise PermissionError('Only the host can modify this jam session.')
+    current_playlist = jam_data.get('playlist', [])
+    song_to_remove = None
+    removed_index = None
+    if (index_hint is not None and index_hint < len(current_playlist)
+            and current_playlist[index_hint].get('id') == song_id):
+        song_to_remove = current_playlist[index_hint]
+        removed_index = index_hint
+    else:
+        for i, s in enumerate(current_playlist):
+            if s.get('id') == song_id:
+                song_to_remove = s
+                removed_index = i
+                break
+    if song_to_remove is None:
+        return False
+    # ArrayRemove deletes the matching element server-side: the write carries
+    # one song, not the whole rewritten playlist.
+    updates = dict(extra_updates) if extra_updates else {}
+    updates.pop('playlist', None) # Pre-removal copy would resurrect the song
+    updates['playlist'] = firestore.ArrayRemove([song_to_remove])
+    # Removing a song above the current one shifts it down by one; fix the
+    # index in the same commit so playback doesn't jump to the wrong track.
+    # A folded pending sync uses the same dotted keys, so its (newer) index
+    # takes precedence over the snapshot's.
+    current_idx = updates.get('playback_state.current_track_index')
+    if not isinstance(current_idx, int):
+        current_idx = (jam_data.get('playback_state') or {}).get('current_track_index')
+    if isinstance(current_idx, int) and removed_index < current_idx:
+        updates['playback_state.current_track_index'] = current_idx - 1
+    updates.setdefault('playback_state.timestamp', firestore.SERVER_TIMESTAMP) # Update timestamp to trigger sync
+    transaction.update(jam_ref, updates)
+    return True
+
+# The manifest song shape; payloads matching it can be canonicalized below.
+_SONG_FIELDS = ('id', 'title', 'artist', 'url', 'duration', 'type', 'thumbnail')
+
+@lru_cache(maxsize=4096)
+def _canonical_song(song_id, title, artist, url, duration, song_type, thumbnail):
+    """Returns one shared dict per distinct song payload.
+
+    Re-adding a popular song (other jams, client retries) then reuses the
+    same object, so the Firestore client's recursive dict-to-protobuf
+    conversion walks identical structure and the playlist caches share
+    storage instead of holding per-add copies.
+    """
+    return {'id': song_id, 'title': title, 'artist': artist, 'url': url,
+            'duration': duration, 'type': song_type, 'thumbnail': thumbnail}
+
+def _background_host_update(jam_id, jam_ref, sid, updates):
+    """Persists an already-fanned-out host mutation from a background task.
+
+    Peers were told optimistically before this runs, so a failure is logged
+    and surfaced to the host; everyone else reconciles via the client-side
+    Firestore listener.
+    """
+    try:
+        # _apply_host_update runs only its Firestore RPC on a native thread
+        # and keeps the cache bookkeeping on this greenlet.
+        _apply_host_update(jam_id, jam_ref, sid, updates)
+    except Exception as e:
+        logging.error(f"Background Firestore write for jam {jam_id} failed: {e}", exc_info=True)
+        socketio.emit('jam_error', {'message': f'Failed to persist change: {e}'}, room=sid)
+
+def _background_firestore_write(description, fn, *args):
+    """Runs a fire-and-forget Firestore call off the event handler.
+
+    For writes whose outcome the client acknowledgement does not depend on
+    (participant bookkeeping, user-status pointers), the handler should not
+    block the worker on the RPC; failures are logged and the next
+    authoritative read self-heals.
+    """
+    try:
+        # A background greenlet still shares the main OS thread; tpool moves
+        # the blocking gRPC call to a native thread so the event loop keeps
+        # serving sockets for the duration of the RTT.
+        tpool.execute(fn, *args)
+    except Exception as e:
+        logging.error(f"Background Firestore write ({description}) failed: {e}", exc_info=True)
+
+def _background_remove_song(jam_id, jam_ref, sid, song_id, index_hint, pending_updates):
+    """Background half of an optimistically fanned-out song removal."""
+    try:
+        # Same native-thread treatment as the other background writes.
+        removed = tpool.execute(_remove_song_tx, db.transaction(), jam_ref,
+                                sid, song_id, index_hint, pending_updates)
+        _invalidate_jam_cache(jam_id)
+        if not removed:
+            # Nothing was written, so the drained sync state was not
+            # persisted either - put it back for the flusher.
+            _requeue_pending_sync(jam_id, pending_updates)
+            # Peers already saw the delta; the Firestore listener restores them.
+            logging.warning(f"Optimistic removal of '{song_id}' from jam {jam_id} found no such song.")
+    except Exception as e:
+        _requeue_pending_sync(jam_id, pending_updates)
+        logging.error(f"Background removal of '{song_id}' from jam {jam_id} failed: {e}", exc_info=True)
+        socketio.emit('jam_error', {'message': f'Failed to persist removal: {e}'}, room=sid)
 
 # *** IMPORTANT: Your original `generate_unique_6_digit_jam_id` was not `async`.
 # If you make it `async`, you need `eventlet.sleep()` if it's CPU-bound or `eventlet.spawn_after`
@@ -256,7 +694,8 @@ def generate_unique_6_digit_jam_id(): # No 'async' keyword here
     
     for _ in range(10): # Try up to 10 times to find a unique ID
         jam_id = str(random.randint(100000, 999999))
-        jam_doc = db.collection('jam_sessions').document(jam_id).get() # No 'await'
+        # Existence probe: project a single tiny field instead of the whole doc
+        jam_doc = db.collection('jam_sessions').document(jam_id).get(field_paths=['is_active'])
         if not jam_doc.exists:
             return jam_id
     logging.error("Failed to generate a unique 6-digit jam ID after multiple attempts.")
@@ -267,7 +706,7 @@ def get_user_jam_session_status(user_id):
         logging.error("Firestore DB not initialized for get_user_jam_session_status.")
         return None
     users_ref = db.collection('users').document(user_id)
-    user_doc = users_ref.get()
+    user_doc = users_ref.get(field_paths=['current_jam_session_id'])
     if user_doc.exists and 'current_jam_session_id' in user_doc.to_dict():
         return user_doc.to_dict()['current_jam_session_id']
     return None
@@ -314,6 +753,144 @@ else:
     logging.warning("Firestore DB not available, cannot attach snapshot listener for jam sessions.")
 
 
+# --- Playback Sync Debouncing ---
+# Hosts emit sync_playback_state frequently (timer ticks, seeks, pauses).
+# Instead of one Firestore write per event, the latest state per jam is
+# buffered here and a background task flushes it at most once per interval;
+# intermediate states are simply dropped (newest wins). Participants still
+# hear about every state change immediately via the room broadcast in the
+# handler - only the Firestore persistence is coalesced.
+SYNC_FLUSH_INTERVAL = 0.5 # seconds
+_PENDING_SYNC = {} # jam_id -> latest Firestore update payload
+# Hash of the song-id sequence last persisted per jam. Sync ticks almost
+# always carry a playlist identical to the previous one; matching hashes let
+# the write carry only playback_state instead of O(songs) bytes.
+_LAST_PLAYLIST_HASH = TTLCache(maxsize=4096, ttl=6 * 3600)
+# (track_index, is_playing, playback_time) last queued for persistence per
+# jam. Ticks within this playback-time delta of it carry no user-observable
+# change and skip persistence entirely.
+SYNC_SKIP_DELTA_SECONDS = 2.0
+_LAST_SYNCED_STATE = TTLCache(maxsize=4096, ttl=6 * 3600)
+# (jam_id, sid, event) tuples currently being processed; duplicates arriving
+# while one is in flight are dropped rather than queued behind it.
+_INFLIGHT_EVENTS = set()
+# Guards the snapshot-and-clear in the flusher against concurrent handler
+# writes. Under eventlet this is a cheap greenlet lock, but it also stays
+# correct if the server ever runs under a threaded async_mode.
+_PENDING_SYNC_LOCK = threading.Lock()
+_sync_flusher = None
+
+def _requeue_pending_sync(jam_id, updates):
+    """Puts a drained sync payload back in the buffer after a failed commit,
+    unless a newer state has been buffered in the meantime."""
+    if updates is None:
+        return
+    with _PENDING_SYNC_LOCK:
+        _PENDING_SYNC.setdefault(jam_id, updates)
+
+def _ensure_sync_flusher():
+    global _sync_flusher
+    if _sync_flusher is None:
+        _sync_flusher = socketio.start_background_task(_flush_pending_sync_loop)
+
+# Bounded concurrency for the flush: distinct jams commit in parallel (each
+# on a native thread via tpool) instead of serializing on one RTT per jam.
+_FLUSH_POOL_SIZE = 10
+_flush_pool = eventlet.GreenPool(_FLUSH_POOL_SIZE)
+
+# Transient gRPC failures (deadline, unavailable) get exactly one short
+# backoff retry; anything else fails fast.
+_TRANSIENT_RETRY_DELAY = 0.2 # seconds
+
+def _commit_with_retry(description, fn, *args):
+    """Runs a blocking Firestore commit on a native thread, returning True
+    on success.
+
+    DeadlineExceeded/ServiceUnavailable are retried once after a short
+    backoff. Other API errors are logged without traceback formatting - the
+    exception class and message carry everything useful, and formatting a
+    full stack per failed RPC is measurable on failure-heavy paths. Only
+    genuinely unexpected errors keep exc_info.
+    """
+    for attempt in (1, 2):
+        try:
+            # tpool runs the blocking gRPC call on a real OS thread and
+            # yields this greenlet, so other sockets keep being served
+            # while the Firestore write is in flight.
+            tpool.execute(fn, *args)
+            return True
+        except (gcp_exceptions.DeadlineExceeded, gcp_exceptions.ServiceUnavailable) as e:
+            if attempt == 1:
+                logging.warning(f"Transient Firestore error on {description} ({e.__class__.__name__}); retrying.")
+                socketio.sleep(_TRANSIENT_RETRY_DELAY)
+            else:
+                logging.error(f"Firestore {description} failed after retry: {e}")
+        except gcp_exceptions.GoogleAPICallError as e:
+            logging.error(f"Firestore rejected {description}: {e}")
+            return False
+        except Exception as e:
+            logging.error(f"Error during {description}: {e}", exc_info=True)
+            return False
+    return False
+
+def _flush_one_jam(jam_id, updates):
+    jam_ref = get_jam_session_ref(jam_id)
+    if jam_ref is None:
+        return
+    if _commit_with_retry(f"sync flush for jam {jam_id}", jam_ref.update, updates):
+        _invalidate_jam_cache(jam_id)
+    else:
+        # The payload is dropped for good here, so the document never saw it.
+        # Forget what we think was persisted or later ticks would keep
+        # skipping an "unchanged" playlist/state the document never received.
+        _LAST_PLAYLIST_HASH.pop(jam_id, None)
+        _LAST_SYNCED_STATE.pop(jam_id, None)
+
+# Firestore caps a WriteBatch at 500 mutations; each flushed jam is one.
+_FIRESTORE_BATCH_LIMIT = 500
+
+def _flush_batch(items):
+    """Commits a chunk of (jam_id, updates) pairs as one WriteBatch RPC.
+
+    Every jam appears at most once per wave (the buffer is keyed by jam_id),
+    so the batch never has two mutations against the same document. If the
+    batch as a whole fails, each jam retries individually so one bad payload
+    cannot sink the rest.
+    """
+    batch = db.batch()
+    for jam_id, updates in items:
+        batch.update(get_jam_session_ref(jam_id), updates)
+    if _commit_with_retry(f"batched sync flush of {len(items)} jams", batch.commit):
+        for jam_id, _ in items:
+            _invalidate_jam_cache(jam_id)
+    else:
+        # One bad payload must not sink the wave - retry jams individually.
+        for jam_id, updates in items:
+            _flush_one_jam(jam_id, updates)
+
+def _flush_pending_sync_loop():
+    logging.info("Playback sync flusher task started.")
+    while True:
+        socketio.sleep(SYNC_FLUSH_INTERVAL)
+        if not _PENDING_SYNC:
+            continue
+        with _PENDING_SYNC_LOCK:
+            pending = dict(_PENDING_SYNC)
+            _PENDING_SYNC.clear()
+        items = list(pending.items())
+        if len(items) == 1:
+            # Single jam: a plain update beats batch bookkeeping.
+            _flush_pool.spawn_n(_flush_one_jam, *items[0])
+        else:
+            # Many jams: amortize the RPC/auth overhead across up to 500
+            # mutations per commit, with chunks committing in parallel.
+            for start in range(0, len(items), _FIRESTORE_BATCH_LIMIT):
+                _flush_pool.spawn_n(_flush_batch, items[start:start + _FIRESTORE_BATCH_LIMIT])
+        # Finish the whole wave before the next interval so one jam's slow
+        # commit can't interleave with its own newer state.
+        _flush_pool.waitall()
+
+
 # --- Socket.IO Events ---
 
 @socketio.on('connect')
@@ -327,7 +904,29 @@ def handle_connect():
 def handle_disconnect():
     user_id = request.args.get('userId')
     logging.info(f"Client disconnected: {request.sid}, User ID: {user_id}")
-    # Removed automatic leave logic here; client should explicitly leave or host handles session end
+    jam_id = _SID_JAM.pop(request.sid, None)
+    if not jam_id or not db:
+        return
+    if _HOST_SID_CACHE.get(jam_id) == request.sid:
+        # A host drop may be a transient network blip; ending the session is
+        # an explicit action (leave_session), so leave the jam intact. The
+        # cached sid is dead though - drop it so it cannot shadow a rejoined
+        # host carrying a fresh sid.
+        _HOST_SID_CACHE.pop(jam_id, None)
+        return
+    try:
+        jam_ref = get_jam_session_ref(jam_id)
+        if jam_ref is not None:
+            # One idempotent single-document delete, then an O(1) delta to the
+            # room - never a rebuilt participants map.
+            jam_ref.collection('participants').document(request.sid).delete()
+        cached_participants = _PARTICIPANTS_CACHE.get(jam_id)
+        if cached_participants is not None:
+            cached_participants.pop(request.sid, None)
+        socketio.emit('participant_left', {'sid': request.sid}, room=jam_id)
+        logging.info(f"Cleaned up disconnected participant {request.sid} from jam {jam_id}.")
+    except Exception as e:
+        logging.error(f"Error cleaning up disconnected SID {request.sid} from jam {jam_id}: {e}", exc_info=True)
 
 # Removed emit_jam_session_state as it's now handled by the Firestore listener automatically
 
@@ -365,7 +964,6 @@ def handle_create_session(data): # Removed 'async'
         'name': jam_name,
         'host_id': user_id,
         'host_sid': request.sid, # Store the host's Socket.IO SID
-        'participants': {request.sid: nickname}, # Map of SID to nickname
         'playlist': [],
         'playback_state': {
             'current_track_index': 0,
@@ -378,7 +976,20 @@ def handle_create_session(data): # Removed 'async'
     }
     try:
         jam_ref.set(initial_state) # Removed 'await'
-        set_user_jam_session_status(user_id, jam_id) # Set user's current jam
+        _playlist_cache_set(jam_id, [])
+        # The host is the first document in the participants subcollection.
+        # The ack doesn't depend on this write (or the user-status pointer),
+        # so both run off-handler instead of blocking the worker on the RPC.
+        socketio.start_background_task(
+            _background_firestore_write, f"host participant doc for jam {jam_id}",
+            jam_ref.collection('participants').document(request.sid).set,
+            {'nickname': nickname, 'joined_at': firestore.SERVER_TIMESTAMP})
+        _PARTICIPANTS_CACHE[jam_id] = {request.sid: nickname}
+        _HOST_SID_CACHE[jam_id] = request.sid
+        _SID_JAM[request.sid] = jam_id
+        socketio.start_background_task(
+            _background_firestore_write, f"jam status for user {user_id}",
+            set_user_jam_session_status, user_id, jam_id) # Set user's current jam
 
         join_room(jam_id) # Join the Socket.IO room
 
@@ -388,7 +999,7 @@ def handle_create_session(data): # Removed 'async'
             'shareable_link': shareable_link,
             'is_host': True,
             'nickname_used': nickname,
-            'participants': initial_state['participants']
+            'participants': {request.sid: nickname}
         }, room=request.sid)
         logging.info(f"User {user_id} (SID: {request.sid}) created jam session: {jam_id} - '{jam_name}'")
     except Exception as e:
@@ -410,37 +1021,46 @@ def handle_join_session(data): # Removed 'async'
         return
 
     jam_ref = get_jam_session_ref(jam_id)
-    jam_doc = jam_ref.get() # Removed 'await'
+    jam_state = get_jam(jam_id)
 
-    if jam_doc.exists and jam_doc.to_dict().get('is_active'):
+    if jam_state and jam_state.get('is_active'):
         try:
-            current_participants = jam_doc.to_dict().get('participants', {})
-            # Add new participant (Socket.IO SID to nickname mapping)
-            current_participants[request.sid] = nickname 
-            jam_ref.update({'participants': current_participants}) # Removed 'await'
-            set_user_jam_session_status(user_id, jam_id) # Set user's current jam
+            # One independent single-document write per join: no shared map to
+            # read-modify-write, no contention with concurrent joins. The join
+            # ack doesn't need its result, so it runs off-handler.
+            socketio.start_background_task(
+                _background_firestore_write, f"participant doc for jam {jam_id}",
+                jam_ref.collection('participants').document(request.sid).set,
+                {'nickname': nickname, 'joined_at': firestore.SERVER_TIMESTAMP})
+            current_participants = _get_jam_participants(jam_id)
+            current_participants[request.sid] = nickname
+            _PARTICIPANTS_CACHE[jam_id] = dict(current_participants)
+            # Remember the host for this jam so host-only events on this
+            # instance can skip the verification read.
+            _HOST_SID_CACHE[jam_id] = jam_state.get('host_sid')
+            _SID_JAM[request.sid] = jam_id
+            socketio.start_background_task(
+                _background_firestore_write, f"jam status for user {user_id}",
+                set_user_jam_session_status, user_id, jam_id) # Set user's current jam
 
             join_room(jam_id) # Join the Socket.IO room
-
-            # Emit success to joining client with current jam state
-            jam_state = jam_doc.to_dict()
+            # playback_state already carries track index, time, playing flag
+            # and sync timestamp; don't duplicate them at the top level.
             emit('session_join_success', {
                 'jam_id': jam_id,
                 'jam_name': jam_state.get('name', 'Unknown Jam'),
                 'playlist': jam_state.get('playlist', []),
                 'playback_state': jam_state.get('playback_state', {}),
-                'current_track_index': jam_state.get('playback_state', {}).get('current_track_index', 0),
-                'current_playback_time': jam_state.get('playback_state', {}).get('current_playback_time', 0),
-                'is_playing': jam_state.get('playback_state', {}).get('is_playing', False),
-                'last_synced_at': jam_state.get('playback_state', {}).get('timestamp', 0), # Pass timestamp for client-side sync
                 'nickname_used': nickname,
                 'participants': current_participants # Send updated list of participants
             }, room=request.sid)
 
-            # Inform all other clients in the room about the new participant
-            socketio.emit('update_participants', {
-                'jam_id': jam_id,
-                'participants': current_participants
+            # Inform the room about just the new participant; clients maintain
+            # their own map (hydrated once via session_join_success), so the
+            # broadcast is O(1) instead of the whole participants dict.
+            socketio.emit('participant_joined', {
+                'sid': request.sid,
+                'nickname': nickname
             }, room=jam_id, skip_sid=request.sid)
 
             logging.info(f"User {user_id} (SID: {request.sid}) joined jam session: {jam_id}")
@@ -465,39 +1085,45 @@ def handle_leave_session(data): # Removed 'async'
         return
 
     jam_ref = get_jam_session_ref(jam_id)
-    jam_doc = jam_ref.get() # Removed 'await'
 
-    if jam_doc.exists:
-        try:
-            jam_data = jam_doc.to_dict()
-            current_participants = jam_data.get('participants', {})
-
-            if request.sid in current_participants:
-                del current_participants[request.sid] # Remove by SID
-
-                if jam_data.get('host_sid') == request.sid: # If host is leaving
-                    jam_ref.update({'is_active': False, 'ended_at': firestore.SERVER_TIMESTAMP}) # Removed 'await'
-                    logging.info(f"Host (SID: {request.sid}) ended jam session {jam_id}.")
-                    # No need to update participants if session is ending, as 'session_ended' will be sent
-                else: # Participant leaving
-                    jam_ref.update({'participants': current_participants}) # Removed 'await'
-                    logging.info(f"User (SID: {request.sid}) left jam session {jam_id}.")
-                    # Inform others about updated participant list
-                    socketio.emit('update_participants', {
-                        'jam_id': jam_id,
-                        'participants': current_participants
-                    }, room=jam_id, skip_sid=request.sid)
-            
-            set_user_jam_session_status(user_id, None) # Clear user's current jam status in Firestore
-            leave_room(jam_id)
-            emit('session_ended', {'jam_id': jam_id, 'message': 'You have left the jam session.'}, room=request.sid) # Confirm leave to self
+    try:
+        # Host check and the resulting write (deactivate the jam, or delete
+        # this SID's participant doc) commit in one transactional round-trip.
+        ended = _leave_jam_tx(db.transaction(), jam_ref, request.sid)
+        _invalidate_jam_cache(jam_id)
+        if ended:
+            _HOST_SID_CACHE.pop(jam_id, None) # Session over; drop the cached host
+            with _PENDING_SYNC_LOCK:
+                _PENDING_SYNC.pop(jam_id, None) # Don't flush state for an ended session
+            _LAST_PLAYLIST_HASH.pop(jam_id, None)
+            _LAST_SYNCED_STATE.pop(jam_id, None)
+            _playlist_cache_drop(jam_id)
+            _PARTICIPANTS_CACHE.pop(jam_id, None)
+            logging.info(f"Host (SID: {request.sid}) ended jam session {jam_id}.")
+            # No need to touch participants if session is ending, as 'session_ended' will be sent
+        else:
+            cached_participants = _PARTICIPANTS_CACHE.get(jam_id)
+            if cached_participants is not None:
+                cached_participants.pop(request.sid, None)
+            logging.info(f"User (SID: {request.sid}) left jam session {jam_id}.")
+            # O(1) delta instead of the whole participants dict
+            socketio.emit('participant_left', {
+                'sid': request.sid
+            }, room=jam_id, skip_sid=request.sid)
 
-        except Exception as e:
-            logging.error(f"Error leaving jam session {jam_id} for user {user_id}: {e}", exc_info=True)
-            emit('jam_error', {'message': f'Failed to leave jam session: {e}'}, room=request.sid)
-    else:
+        _SID_JAM.pop(request.sid, None)
+        socketio.start_background_task(
+            _background_firestore_write, f"jam status clear for user {user_id}",
+            set_user_jam_session_status, user_id, None) # Clear user's current jam status in Firestore
+        leave_room(jam_id)
+        emit('session_ended', {'jam_id': jam_id, 'message': 'You have left the jam session.'}, room=request.sid) # Confirm leave to self
+
+    except LookupError:
         emit('jam_error', {'message': 'Jam session not found.'}, room=request.sid)
         logging.warning(f"User {user_id} attempted to leave non-existent jam session: {jam_id}")
+    except Exception as e:
+        logging.error(f"Error leaving jam session {jam_id} for user {user_id}: {e}", exc_info=True)
+        emit('jam_error', {'message': f'Failed to leave jam session: {e}'}, room=request.sid)
 
 @socketio.on('sync_playback_state')
 def handle_sync_playback_state(data): # Removed 'async'
@@ -506,39 +1132,111 @@ def handle_sync_playback_state(data): # Removed 'async'
         return
 
     jam_id = data.get('jam_id')
-    current_track_index = data.get('current_track_index')
-    current_playback_time = data.get('current_playback_time')
-    is_playing = data.get('is_playing')
-    playlist = data.get('playlist') # Host sends its current playlist
 
-    jam_ref = get_jam_session_ref(jam_id)
-    jam_doc = jam_ref.get() # Removed 'await'
+    # Fast-fail without any Firestore traffic when we already know the
+    # caller is not the host of this jam.
+    cached_host = _HOST_SID_CACHE.get(jam_id)
+    if cached_host is not None and cached_host != request.sid:
+        emit('jam_error', {'message': 'Only the host can control playback.'}, room=request.sid)
+        return
 
-    if jam_doc.exists:
-        jam_data = jam_doc.to_dict()
-        if jam_data.get('host_sid') != request.sid:
-            emit('jam_error', {'message': 'Only the host can control playback.'}, room=request.sid)
-            return
+    # Under a tick storm a client can queue several syncs before the first
+    # one finishes (the cache-miss path blocks on a transaction). Later
+    # ticks supersede earlier ones anyway, so while one is in flight for
+    # this (jam, sid) the rest are dropped instead of queueing up work.
+    inflight_key = (jam_id, request.sid, 'sync')
+    if inflight_key in _INFLIGHT_EVENTS:
+        return
+    _INFLIGHT_EVENTS.add(inflight_key)
+    try:
+        _sync_playback_state(jam_id, cached_host, data)
+    finally:
+        _INFLIGHT_EVENTS.discard(inflight_key)
+
+def _sync_playback_state(jam_id, cached_host, data):
+    g = data.get # Bind once; this runs per tick
+    current_track_index = g('current_track_index')
+    current_playback_time = g('current_playback_time')
+    is_playing = g('is_playing')
+    playlist = g('playlist') # Host sends its current playlist
 
-        playback_state = {
+    jam_ref = get_jam_session_ref(jam_id)
+
+    # Dotted paths mutate just the changed sub-fields; replacing the whole
+    # playback_state map would make Firestore reserialize and reindex all of
+    # it on every tick.
+    firestore_updates = {
+        'playback_state.current_track_index': current_track_index,
+        'playback_state.current_playback_time': current_playback_time,
+        'playback_state.is_playing': is_playing,
+        'playback_state.timestamp': firestore.SERVER_TIMESTAMP # Update timestamp on every sync
+    }
+    # One payload shared by both branches below; the room fan-out serializes
+    # it once per broadcast regardless.
+    broadcast_payload = {
+        'playlist': playlist,
+        'playback_state': {
             'current_track_index': current_track_index,
             'current_playback_time': current_playback_time,
             'is_playing': is_playing,
-            'timestamp': firestore.SERVER_TIMESTAMP # Update timestamp on every sync
+            'timestamp': time.time()
         }
-        try:
-            # Update both playlist and playback state in one go
-            jam_ref.update({ # Removed 'await'
-                'playlist': playlist,
-                'playback_state': playback_state
-            })
-            logging.info(f"Jam session {jam_id} state updated by host (SID: {request.sid}).")
-            # Firestore listener will propagate this change to all clients in the room.
-        except Exception as e:
-            logging.error(f"Error updating jam session {jam_id} state from host: {e}", exc_info=True)
-            emit('jam_error', {'message': f'Failed to sync state: {e}'}, room=request.sid)
-    else:
+    }
+    try:
+        # Only persist the playlist when its song-id sequence actually
+        # changed; the typical tick then writes O(1) state bytes instead of
+        # O(songs). Inside the try: a malformed playlist payload (wrong type,
+        # non-dict entries) must surface as a jam_error, not an unhandled
+        # exception out of the event handler.
+        playlist_hash = hash(tuple(s.get('id') for s in (playlist or [])))
+        playlist_changed = _LAST_PLAYLIST_HASH.get(jam_id) != playlist_hash
+        if playlist_changed:
+            firestore_updates['playlist'] = playlist
+        if cached_host == request.sid:
+            # Participants hear the tentative state before any persistence
+            # work: perceived sync latency is the fan-out, not Firestore.
+            socketio.emit('jam_session_state', broadcast_payload,
+                          room=jam_id, skip_sid=request.sid)
+            # Ticks that convey no user-observable change (same track, same
+            # play/pause flag, clock advanced less than the threshold and an
+            # untouched playlist) skip persistence entirely; the next
+            # meaningful change catches the document up.
+            last_state = _LAST_SYNCED_STATE.get(jam_id)
+            if (not playlist_changed and last_state is not None
+                    and last_state[0] == current_track_index
+                    and last_state[1] == is_playing
+                    and isinstance(current_playback_time, (int, float))
+                    and isinstance(last_state[2], (int, float))
+                    and abs(current_playback_time - last_state[2]) < SYNC_SKIP_DELTA_SECONDS):
+                return
+            # Known host: just buffer the state; the background flusher
+            # coalesces bursts into at most one Firestore write per interval.
+            with _PENDING_SYNC_LOCK:
+                _PENDING_SYNC[jam_id] = firestore_updates
+            _ensure_sync_flusher()
+            _LAST_SYNCED_STATE[jam_id] = (current_track_index, is_playing, current_playback_time)
+        else:
+            # Cache miss (or imposter): verify the host transactionally and
+            # write through immediately; peers are only told once the caller
+            # is proven to be the host.
+            _host_guarded_update(db.transaction(), jam_ref, request.sid, firestore_updates)
+            _HOST_SID_CACHE[jam_id] = request.sid
+            _LAST_SYNCED_STATE[jam_id] = (current_track_index, is_playing, current_playback_time)
+            socketio.emit('jam_session_state', broadcast_payload,
+                          room=jam_id, skip_sid=request.sid)
+
+        if playlist_changed:
+            _LAST_PLAYLIST_HASH[jam_id] = playlist_hash
+            # The host's sync carries the full playlist - refresh the local view
+            _playlist_cache_set(jam_id, list(playlist or []))
+        logging.info(f"Jam session {jam_id} state updated by host (SID: {request.sid}).")
+    except LookupError:
         emit('jam_error', {'message': 'Jam session not found.'}, room=request.sid)
+    except PermissionError:
+        emit('jam_error', {'message': 'Only the host can control playback.'}, room=request.sid)
+    except Exception as e:
+        logging.error(f"Error updating jam session {jam_id} state from host: {e}", exc_info=True)
+        emit('jam_error', {'message': f'Failed to sync state: {e}'}, room=request.sid)
 
 @socketio.on('add_song_to_jam')
 def handle_add_song_to_jam(data): # Removed 'async'
@@ -553,29 +1251,49 @@ def handle_add_song_to_jam(data): # Removed 'async'
         emit('jam_error', {'message': 'Missing jam ID or song data.'}, room=request.sid)
         return
 
-    jam_ref = get_jam_session_ref(jam_id)
-    jam_doc = jam_ref.get() # Removed 'await'
+    if not song.get('id'):
+        song['id'] = _new_song_id()
 
-    if jam_doc.exists:
-        jam_data = jam_doc.to_dict()
-        if jam_data.get('host_sid') != request.sid:
-            emit('jam_error', {'message': 'Only the host can add songs to the playlist.'}, room=request.sid)
-            return
-
-        current_playlist = jam_data.get('playlist', [])
-        current_playlist.append(song)
+    # Manifest-shaped payloads collapse to one shared dict per song; anything
+    # carrying extra or unhashable fields passes through untouched.
+    if set(song) <= set(_SONG_FIELDS):
         try:
-            jam_ref.update({ # Removed 'await'
-                'playlist': current_playlist,
-                'playback_state.timestamp': firestore.SERVER_TIMESTAMP # Update timestamp to trigger sync
-            })
+            song = _canonical_song(*(song.get(f) for f in _SONG_FIELDS))
+        except TypeError: # Unhashable field value; skip canonicalization
+            pass
+
+    jam_ref = get_jam_session_ref(jam_id)
+
+    try:
+        # ArrayUnion appends server-side, so no playlist read is needed; with
+        # a host-cache hit this is a single write with no read at all.
+        updates = {
+            'playlist': firestore.ArrayUnion([song]),
+            'playback_state.timestamp': firestore.SERVER_TIMESTAMP # Update timestamp to trigger sync
+        }
+        if _HOST_SID_CACHE.get(jam_id) == request.sid:
+            # Known host: fan out the tentative add immediately and persist
+            # in the background, so peers are not waiting on the Firestore
+            # write RTT. The Firestore listener reconciles on failure.
+            _playlist_cache_add(jam_id, song)
+            socketio.emit('playlist_updated', {'added': song}, room=jam_id, skip_sid=request.sid)
+            socketio.start_background_task(_background_host_update, jam_id, jam_ref, request.sid, updates)
             logging.info(f"Song '{song.get('title', 'unknown')}' added to jam {jam_id} by host.")
-            # The Firestore listener will propagate this to all clients
-        except Exception as e:
-            logging.error(f"Error adding song to jam {jam_id} playlist: {e}", exc_info=True)
-            emit('jam_error', {'message': f'Failed to add song: {e}'}, room=request.sid)
-    else:
+            return
+        # Cache miss: verify the host synchronously before telling anyone.
+        _apply_host_update(jam_id, jam_ref, request.sid, updates)
+        _playlist_cache_add(jam_id, song)
+        # One room-scoped emit serializes the packet once for every listener;
+        # the Firestore listener remains the authoritative reconciliation.
+        socketio.emit('playlist_updated', {'added': song}, room=jam_id, skip_sid=request.sid)
+        logging.info(f"Song '{song.get('title', 'unknown')}' added to jam {jam_id} by host.")
+    except LookupError:
         emit('jam_error', {'message': 'Jam session not found.'}, room=request.sid)
+    except PermissionError:
+        emit('jam_error', {'message': 'Only the host can add songs to the playlist.'}, room=request.sid)
+    except Exception as e:
+        logging.error(f"Error adding song to jam {jam_id} playlist: {e}", exc_info=True)
+        emit('jam_error', {'message': f'Failed to add song: {e}'}, room=request.sid)
 
 @socketio.on('remove_song_from_jam')
 def handle_remove_song_from_jam(data): # Removed 'async'
@@ -591,32 +1309,59 @@ def handle_remove_song_from_jam(data): # Removed 'async'
         return
 
     jam_ref = get_jam_session_ref(jam_id)
-    jam_doc = jam_ref.get() # Removed 'await'
 
-    if jam_doc.exists:
-        jam_data = jam_doc.to_dict()
-        if jam_data.get('host_sid') != request.sid:
-            emit('jam_error', {'message': 'Only the host can remove songs from the playlist.'}, room=request.sid)
-            return
-
-        current_playlist = jam_data.get('playlist', [])
-        updated_playlist = [s for s in current_playlist if s.get('id') != song_id_to_remove]
+    # Fast-fail without any Firestore traffic when we already know the caller
+    # is not the host of this jam.
+    cached_host = _HOST_SID_CACHE.get(jam_id)
+    if cached_host is not None and cached_host != request.sid:
+        emit('jam_error', {'message': 'Only the host can remove songs from the playlist.'}, room=request.sid)
+        return
 
-        if len(current_playlist) != len(updated_playlist): # If a song was actually removed
-            try:
-                jam_ref.update({ # Removed 'await'
-                    'playlist': updated_playlist,
-                    'playback_state.timestamp': firestore.SERVER_TIMESTAMP # Update timestamp
-                })
-                logging.info(f"Song '{song_id_to_remove}' removed from jam {jam_id} by host.")
-                # Firestore listener will propagate this to all clients
-            except Exception as e:
-                logging.error(f"Error removing song '{song_id_to_remove}' from jam {jam_id}: {e}", exc_info=True)
-                emit('jam_error', {'message': f'Failed to remove song: {e}'}, room=request.sid)
+    # Any playback state queued for this jam in the debounce buffer rides
+    # along in the removal's commit, saving the flusher a separate RPC.
+    with _PENDING_SYNC_LOCK:
+        pending_updates = _PENDING_SYNC.pop(jam_id, None)
+    # O(1) position lookup from the local index; verified inside the
+    # transaction against the authoritative playlist before use.
+    index_hint = _PLAYLIST_INDEX.get(jam_id, {}).get(song_id_to_remove)
+    if cached_host == request.sid and index_hint is not None:
+        # Known host removing a song we know exists: fan out the delta now
+        # and run the transaction in the background. A lost race just means
+        # the Firestore listener restores the authoritative playlist.
+        _playlist_cache_remove(jam_id, song_id_to_remove)
+        socketio.emit('playlist_updated', {'removed_id': song_id_to_remove},
+                      room=jam_id, skip_sid=request.sid)
+        socketio.start_background_task(_background_remove_song, jam_id, jam_ref,
+                                       request.sid, song_id_to_remove,
+                                       index_hint, pending_updates)
+        logging.info(f"Song '{song_id_to_remove}' optimistically removed from jam {jam_id} by host.")
+        return
+    try:
+        removed = _remove_song_tx(db.transaction(), jam_ref, request.sid,
+                                  song_id_to_remove, index_hint,
+                                  extra_updates=pending_updates)
+        _invalidate_jam_cache(jam_id)
+        if removed:
+            _playlist_cache_remove(jam_id, song_id_to_remove)
+            # Room-scoped delta: serialized once, fanned out to everyone in
+            # the jam; Firestore remains the authoritative reconciliation.
+            socketio.emit('playlist_updated', {'removed_id': song_id_to_remove},
+                          room=jam_id, skip_sid=request.sid)
+            logging.info(f"Song '{song_id_to_remove}' removed from jam {jam_id} by host.")
         else:
+            # No write happened; re-queue the drained sync state so the
+            # flusher still persists it.
+            _requeue_pending_sync(jam_id, pending_updates)
             emit('jam_error', {'message': 'Song not found in playlist.'}, room=request.sid)
-    else:
+    except LookupError:
         emit('jam_error', {'message': 'Jam session not found.'}, room=request.sid)
+    except PermissionError:
+        _requeue_pending_sync(jam_id, pending_updates)
+        emit('jam_error', {'message': 'Only the host can remove songs from the playlist.'}, room=request.sid)
+    except Exception as e:
+        _requeue_pending_sync(jam_id, pending_updates)
+        logging.error(f"Error removing song '{song_id_to_remove}' from jam {jam_id}: {e}", exc_info=True)
+        emit('jam_error', {'message': f'Failed to remove song: {e}'}, room=request.sid)
 
 
 # --- Error Handlers ---